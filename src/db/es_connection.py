@@ -4,9 +4,14 @@ Pour l'analyse des débats de l'Assemblée Nationale
 """
 
 import re
+import copy
+import json
+import time
+import hashlib
+import functools
 from elasticsearch import Elasticsearch, helpers
 from elasticsearch.exceptions import ConnectionError, RequestError
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 
 def _clean_orateur_nom(s: str) -> str:
@@ -17,6 +22,37 @@ def _clean_orateur_nom(s: str) -> str:
     return s
 
 
+# Cache des requêtes de lecture: durée de vie (secondes) et nombre max d'entrées
+CACHE_TTL = 60
+CACHE_MAXSIZE = 128
+
+
+def _ttl_cached(method):
+    """
+    Met en cache le résultat d'une méthode de lecture ES pour CACHE_TTL secondes,
+    par instance, avec pour clé le SHA-256 du nom de la méthode et de ses arguments.
+    Chaque appel reçoit sa propre copie du résultat: la modifier n'altère pas le cache
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        payload = json.dumps([method.__name__, args, kwargs], sort_keys=True, default=str)
+        key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        now = time.monotonic()
+
+        entry = self._query_cache.get(key)
+        if entry is not None and now - entry[0] < CACHE_TTL:
+            return copy.deepcopy(entry[1])
+
+        result = method(self, *args, **kwargs)
+        self._query_cache[key] = (now, result)
+        # Éviction des entrées les plus anciennes
+        while len(self._query_cache) > CACHE_MAXSIZE:
+            self._query_cache.pop(next(iter(self._query_cache)))
+        return copy.deepcopy(result)
+
+    return wrapper
+
+
 class ESConnection:
     """Gestion de la connexion et des opérations Elasticsearch"""
     
@@ -33,6 +69,8 @@ class ESConnection:
         # #endregion
         self.es = Elasticsearch(es_host)
         self.index_name = "debats_assemblee_nationale"
+        # Cache des requêtes de lecture (vidé à chaque écriture dans l'index)
+        self._query_cache: Dict[str, Any] = {}
         
         # Vérifier la connexion
         try:
@@ -94,6 +132,9 @@ class ESConnection:
                             "keyword": {"type": "keyword", "ignore_above": 256}
                         }
                     },
+                    # Longueur du texte (caractères), calculée à l'indexation pour
+                    # les statistiques sans relire le _source
+                    "texte_length": {"type": "integer"},
                     
                     # Orateur
                     "orateur_nom": {
@@ -141,6 +182,8 @@ class ESConnection:
             }
         }
         
+        self._query_cache.clear()
+        
         # Supprimer l'index s'il existe déjà
         if self.es.indices.exists(index=self.index_name):
             print(f"⚠ L'index '{self.index_name}' existe déjà. Suppression...")
@@ -150,7 +193,37 @@ class ESConnection:
         self.es.indices.create(index=self.index_name, body=mapping)
         print(f"✓ Index '{self.index_name}' créé avec succès")
     
-    def bulk_index(self, documents: List[Dict], batch_size: int = 500, replace_existing: bool = True):
+    def _build_action(self, doc: Dict, replace_existing: bool = True,
+                      auto_id: bool = False) -> Dict:
+        """
+        Construit l'action bulk d'un document
+        Utilise para_id comme identifiant unique pour éviter les doublons
+        
+        Args:
+            doc: Document à indexer
+            replace_existing: Si False, utilise "create" pour ignorer les existants
+            auto_id: Si True, laisse Elasticsearch générer l'_id (écriture en ajout
+                     seul, sans recherche de version; para_id reste un champ keyword)
+        
+        Le champ texte_length est ajouté s'il est absent, sur une copie :
+        le document de l'appelant n'est pas modifié.
+        """
+        if 'texte_length' not in doc:
+            doc = {**doc, 'texte_length': len(doc.get('texte') or '')}
+        action = {
+            "_index": self.index_name,
+            "_source": doc
+        }
+        # Utiliser para_id comme _id unique si disponible
+        if not auto_id and doc.get('para_id'):
+            action["_id"] = doc['para_id']
+        # Si replace_existing=False, utiliser "create" pour ignorer les existants
+        if not replace_existing:
+            action["_op_type"] = "create"
+        return action
+    
+    def bulk_index(self, documents: List[Dict], batch_size: int = 500, replace_existing: bool = True,
+                   auto_id: bool = False):
         """
         Indexe les documents en masse dans Elasticsearch
         Utilise para_id comme identifiant unique pour éviter les doublons
@@ -160,20 +233,14 @@ class ESConnection:
             batch_size: Taille des lots pour l'indexation
             replace_existing: Si True, remplace les documents existants avec le même ID
                               Si False, ignore les documents dont l'ID existe déjà
+            auto_id: Si True, laisse Elasticsearch générer les _id (pas de déduplication
+                     par para_id ni de lecture mget par para_id)
         """
         def generate_actions():
             for doc in documents:
-                action = {
-                    "_index": self.index_name,
-                    "_source": doc
-                }
-                # Utiliser para_id comme _id unique si disponible
-                if doc.get('para_id'):
-                    action["_id"] = doc['para_id']
-                # Si replace_existing=False, utiliser "create" pour ignorer les existants
-                if not replace_existing:
-                    action["_op_type"] = "create"
-                yield action
+                yield self._build_action(doc, replace_existing, auto_id)
+        
+        self._query_cache.clear()
         
         # Indexation en masse
         success, errors = helpers.bulk(
@@ -198,6 +265,50 @@ class ESConnection:
             else:
                 print(f"⚠ {len(errors)} erreurs d'indexation")
     
+    def streaming_index(self, documents: Iterable[Dict], chunk_size: int = 1000,
+                        max_chunk_bytes: int = 5_000_000,
+                        replace_existing: bool = True,
+                        auto_id: bool = False,
+                        on_result: Optional[Callable[[str, Any], None]] = None) -> Dict[str, int]:
+        """
+        Indexe un flux de documents en lots de taille fixe, indépendamment
+        du fichier d'origine (l'itérable peut être alimenté par plusieurs producteurs)
+        
+        Args:
+            documents: Itérable de documents à indexer
+            chunk_size: Nombre maximum de documents par requête _bulk
+            max_chunk_bytes: Taille maximale d'une requête _bulk en octets
+            replace_existing: Si False, ignore les documents dont l'ID existe déjà
+            auto_id: Si True, laisse Elasticsearch générer les _id
+            on_result: Appelé pour chaque document, dans l'ordre du flux, avec son
+                       statut ('success', 'skipped' ou 'failed') et la réponse ES
+            
+        Returns:
+            Dictionnaire {'success', 'skipped', 'failed'} avec le nombre de documents
+        """
+        counts = {'success': 0, 'skipped': 0, 'failed': 0}
+        self._query_cache.clear()
+        
+        for ok, info in helpers.streaming_bulk(
+            self.es.options(request_timeout=120),
+            (self._build_action(doc, replace_existing, auto_id) for doc in documents),
+            chunk_size=chunk_size,
+            max_chunk_bytes=max_chunk_bytes,
+            raise_on_error=False,
+            raise_on_exception=False
+        ):
+            if ok:
+                status = 'success'
+            elif 'version_conflict_engine_exception' in str(info):
+                status = 'skipped'
+            else:
+                status = 'failed'
+            counts[status] += 1
+            if on_result is not None:
+                on_result(status, info)
+        
+        return counts
+    
     def get_document_count(self) -> int:
         """
         Retourne le nombre de documents dans l'index
@@ -208,6 +319,7 @@ class ESConnection:
         count = self.es.count(index=self.index_name)
         return count['count']
 
+    @_ttl_cached
     def get_stats_by_year(self) -> List[Dict]:
         """
         Retourne le nombre d'interventions et le nombre de para_id uniques par année.
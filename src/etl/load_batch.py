@@ -5,22 +5,92 @@ S'intègre avec ANDebatsTransformer et ESConnection
 """
 
 import os
+import re
 import sys
+import copy
 import time
+import queue
 import argparse
+import threading
+import multiprocessing
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
-import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import defaultdict, deque
+import orjson
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 from tqdm import tqdm
 
 # Ajouter le répertoire src au path pour les imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from elasticsearch.exceptions import ApiError, TransportError
+
 from db.es_connection import ESConnection
 from etl.transform import ANDebatsTransformer
 
+# Marqueur de fin de flux pour l'indexeur bulk en arrière-plan
+_QUEUE_END = object()
+
+# Année d'un chemin TAZ: dossier de 4 chiffres (data/raw/2022/...),
+# sinon nom de fichier AN_AAAANNN.taz
+_YEAR_RE = re.compile(r'(?:^|[\\/])(\d{4})(?=[\\/])|_(\d{4})\d{3}\.taz$')
+
+# Nom de fichier TAZ: AN_AAAANNN.taz -> (année, numéro de publication)
+_FILENAME_RE = re.compile(r'AN_(\d{4})(\d{3})')
+
+# État propre à chaque worker (thread ou processus) du traitement parallèle
+_worker_local = threading.local()
+
+
+def _init_worker(transformer: ANDebatsTransformer):
+    """
+    Initialise le transformer du worker à sa création: copie du transformer
+    configuré du loader (reçu picklé par les processus, copié pour les threads)
+    """
+    _worker_local.transformer = copy.deepcopy(transformer)
+
+
+def _iter_files(directory: str, pattern: str):
+    """Parcourt récursivement un répertoire avec os.scandir et produit les fichiers correspondant au pattern"""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path, pattern)
+            elif fnmatch(entry.name, pattern):
+                yield Path(entry.path)
+
+
+def _extract_docs(taz_file: str, transformed_dir: str) -> Tuple[List[Dict], float]:
+    """
+    Extrait les documents d'un fichier TAZ dans un processus worker
+    
+    Returns:
+        Tuple (documents extraits, durée en secondes)
+    """
+    start_time = time.time()
+    documents = _worker_local.transformer.process_taz_file(taz_file, transformed_dir)
+    return documents, time.time() - start_time
+
+
+# Nombre d'échecs Elasticsearch consécutifs de même nature (requêtes bulk ou appels
+# ES d'un fichier) au-delà duquel le traitement est interrompu
+MAX_CONSECUTIVE_FAILURES = 20
+
+# Erreurs comptées par le coupe-circuit: transport et réponses d'erreur ES
+# (pas les fichiers illisibles ou sans document)
+ES_ERRORS = (ApiError, TransportError)
+
+# Réglages d'index pendant le chargement de masse: pas de refresh périodique,
+# translog fsyncé en asynchrone, pas de réplicas
+BULK_INDEX_SETTINGS = {
+    'index.refresh_interval': '-1',
+    'index.translog.durability': 'async',
+    'index.number_of_replicas': 0
+}
+
 
 class BatchLoader:
     """Chargeur de masse pour fichiers TAZ utilisant le transformer existant"""
@@ -29,7 +99,8 @@ class BatchLoader:
                  transformer: Optional[ANDebatsTransformer] = None,
                  es_host: str = "http://localhost:9200",
                  max_workers: int = 3,
-                 transformed_dir: str = "./data/transformed"):
+                 transformed_dir: str = "./data/transformed",
+                 auto_id: bool = False):
         """
         Initialise le batch loader
         
@@ -39,12 +110,28 @@ class BatchLoader:
             es_host: URL Elasticsearch (utilisé si es_conn non fourni)
             max_workers: Nombre de workers parallèles (recommandé: 2-4)
             transformed_dir: Répertoire pour les fichiers JSON transformés
+            auto_id: Si True, laisse ES générer les _id (indexation plus rapide;
+                     la déduplication repose alors sur le skip par fichier)
         """
         self.es_conn = es_conn or ESConnection(es_host)
         self.transformer = transformer or ANDebatsTransformer()
         self.max_workers = max_workers
         self.transformed_dir = transformed_dir
+        self.auto_id = auto_id
         self.stats = self._init_stats()
+        # Échecs ES consécutifs (type, nombre), alimentés aussi par le thread bulk
+        self._failure_streak = (None, 0)
+        self._failure_lock = threading.Lock()
+        self._last_bulk_exception = None
+        
+        # Indexeur bulk partagé entre les fichiers (démarré par run())
+        self._doc_queue: Optional[queue.Queue] = None
+        self._bulk_thread: Optional[threading.Thread] = None
+        # Fichiers d'origine des documents envoyés et pas encore acquittés,
+        # et résultat réel de l'indexation (comptes, première erreur par fichier)
+        self._inflight_files: deque = deque()
+        self._bulk_counts = {'success': 0, 'skipped': 0, 'failed': 0}
+        self._bulk_failures: Dict[str, str] = {}
     
     def _init_stats(self) -> Dict:
         """Initialise les statistiques"""
@@ -54,58 +141,43 @@ class BatchLoader:
             'failed': 0,
             'skipped': 0,
             'documents_indexed': 0,
+            'index_errors': 0,
+            'aborted': False,
             'start_time': None,
             'end_time': None,
             'errors': []
         }
     
-    def find_taz_files(self, base_dir: str, pattern: str = "*.taz") -> List[Path]:
-        """
-        Trouve tous les fichiers TAZ dans l'arborescence
-        
-        Args:
-            base_dir: Répertoire racine
-            pattern: Pattern de recherche
-            
-        Returns:
-            Liste des chemins vers les fichiers TAZ
-        """
-        base_path = Path(base_dir)
-        taz_files = list(base_path.rglob(pattern))
-        return sorted(taz_files)
-    
     def get_year_from_path(self, taz_path: Path) -> str:
         """Extrait l'année depuis le chemin du fichier"""
-        # Chercher un dossier année (4 chiffres)
-        for part in taz_path.parts:
-            if part.isdigit() and len(part) == 4:
-                return part
-        
-        # Sinon, extraire du nom de fichier: AN_2022001.taz
-        filename = taz_path.stem  # AN_2022001
-        if len(filename) >= 9 and filename[3:7].isdigit():
-            return filename[3:7]
-        
+        match = _YEAR_RE.search(str(taz_path))
+        if match:
+            return match.group(1) or match.group(2)
         return "unknown"
     
-    def organize_files_by_year(self, taz_files: List[Path]) -> Dict[str, List[Path]]:
+    def scan_and_group(self, base_dir: str,
+                       pattern: str = "*.taz") -> Tuple[List[Path], Dict[str, List[Path]]]:
         """
-        Organise les fichiers par année
+        Trouve les fichiers TAZ et les organise par année en un seul parcours
         
         Args:
-            taz_files: Liste des fichiers TAZ
+            base_dir: Répertoire racine
+            pattern: Pattern de recherche
             
         Returns:
-            Dictionnaire {année: [liste de fichiers]}
+            Tuple (liste triée des fichiers TAZ, dictionnaire {année: [fichiers triés]})
         """
-        by_year = {}
-        for taz_file in taz_files:
-            year = self.get_year_from_path(taz_file)
-            if year not in by_year:
-                by_year[year] = []
-            by_year[year].append(taz_file)
+        taz_files = []
+        by_year = defaultdict(list)
+        for taz_file in _iter_files(base_dir, pattern):
+            taz_files.append(taz_file)
+            by_year[self.get_year_from_path(taz_file)].append(taz_file)
+        
+        taz_files.sort()
+        for files in by_year.values():
+            files.sort()
         
-        return by_year
+        return taz_files, dict(by_year)
     
     def check_if_already_indexed(self, taz_file: Path) -> bool:
         """
@@ -117,42 +189,70 @@ class BatchLoader:
         Returns:
             True si déjà indexé, False sinon
         """
-        # Extraire l'année et le numéro du nom de fichier
-        filename = taz_file.stem  # AN_2022001
-        
-        # Pattern: AN_AAAANNNN
-        if len(filename) < 11:
+        # Extraire l'année et le numéro du nom de fichier (AN_AAAANNN.taz)
+        match = _FILENAME_RE.match(taz_file.name)
+        if not match:
             return False
+        year, num = int(match.group(1)), int(match.group(2))
         
         try:
-            year = int(filename[3:7])
-            num = int(filename[7:10])
-            
             # Chercher dans ES si des documents de cette année et numéro existent
-            query = {
-                "query": {
+            response = self.es_conn.es.count(
+                index=self.es_conn.index_name,
+                query={
                     "bool": {
                         "must": [
                             {"term": {"annee": year}},
                             {"term": {"publication_numero": num}}
                         ]
                     }
-                },
-                "size": 0
-            }
-            
-            response = self.es_conn.es.count(
-                index=self.es_conn.index_name, 
-                body=query
+                }
             )
             return response['count'] > 0
             
-        except (ValueError, IndexError):
-            return False
         except Exception:
             # Si ES n'est pas accessible, on ne skip pas
             return False
     
+    def _new_result(self, taz_file: Path) -> Dict:
+        """Crée le dictionnaire de résultat d'un fichier"""
+        return {
+            'file': str(taz_file),
+            'status': 'pending',
+            'documents': 0,
+            'error': None,
+            'error_type': None,
+            'duration': 0
+        }
+    
+    def _complete_result(self, result: Dict, documents: List[Dict], index_to_es: bool):
+        """
+        Indexe les documents extraits d'un fichier et complète son résultat
+        
+        Args:
+            result: Résultat du fichier (modifié en place)
+            documents: Documents extraits du fichier
+            index_to_es: Si True, indexe dans Elasticsearch
+        """
+        if not documents:
+            result['status'] = 'failed'
+            result['error'] = 'Aucun document extrait'
+            return
+        
+        # Indexer dans ES si demandé: les documents rejoignent le flux
+        # bulk commun à tous les fichiers quand l'indexeur tourne
+        # (statistiques provisoires, corrigées par _reconcile_bulk_stats)
+        if index_to_es:
+            if self._doc_queue is not None:
+                for doc in documents:
+                    self._doc_queue.put((result['file'], doc))
+            else:
+                self.es_conn.bulk_index(documents, replace_existing=False, auto_id=self.auto_id)
+                self._record_es_success()
+        
+        result['status'] = 'success'
+        result['documents'] = len(documents)
+    
     def process_single_file(self, taz_file: Path, skip_existing: bool = True,
                             index_to_es: bool = True) -> Dict:
         """
@@ -166,13 +266,7 @@ class BatchLoader:
         Returns:
             Dictionnaire avec le résultat du traitement
         """
-        result = {
-            'file': str(taz_file),
-            'status': 'pending',
-            'documents': 0,
-            'error': None,
-            'duration': 0
-        }
+        result = self._new_result(taz_file)
         
         start_time = time.time()
         
@@ -181,35 +275,210 @@ class BatchLoader:
             if skip_existing and self.check_if_already_indexed(taz_file):
                 result['status'] = 'skipped'
                 result['documents'] = 0
+                self._record_es_success()
                 return result
             
-            # Transformer le fichier
-            documents = self.transformer.process_taz_file(
+            # Transformer le fichier (transformer du worker s'il existe, sinon celui du loader)
+            transformer = getattr(_worker_local, 'transformer', self.transformer)
+            documents = transformer.process_taz_file(
                 str(taz_file), 
                 self.transformed_dir
             )
             
-            if not documents:
-                result['status'] = 'failed'
-                result['error'] = 'Aucun document extrait'
-                return result
-            
-            # Indexer dans ES si demandé
-            if index_to_es:
-                self.es_conn.bulk_index(documents, replace_existing=False)
-            
-            result['status'] = 'success'
-            result['documents'] = len(documents)
+            self._complete_result(result, documents, index_to_es)
             
         except Exception as e:
-            result['status'] = 'failed'
-            result['error'] = str(e)
+            self._fail_result(result, e)
         
         finally:
             result['duration'] = time.time() - start_time
         
         return result
     
+    def _fail_result(self, result: Dict, error: Exception):
+        """Marque un résultat en échec; une erreur ES alimente le coupe-circuit"""
+        result['status'] = 'failed'
+        result['error'] = str(error)
+        result['error_type'] = type(error).__name__
+        if isinstance(error, ES_ERRORS):
+            self._record_es_failure(type(error).__name__)
+    
+    def _start_bulk_indexer(self):
+        """Démarre le thread d'indexation bulk qui regroupe les documents de tous les fichiers"""
+        self._doc_queue = queue.Queue(maxsize=10000)
+        self._inflight_files = deque()
+        self._bulk_counts = {'success': 0, 'skipped': 0, 'failed': 0}
+        self._bulk_failures = {}
+        self._bulk_thread = threading.Thread(
+            target=self._bulk_worker,
+            name="bulk-indexer",
+            daemon=True
+        )
+        self._bulk_thread.start()
+    
+    def _iter_queued_docs(self):
+        """Consomme la file de documents jusqu'au marqueur de fin en retenant leur fichier d'origine"""
+        while True:
+            item = self._doc_queue.get()
+            if item is _QUEUE_END:
+                return
+            source, doc = item
+            self._inflight_files.append(source)
+            yield doc
+    
+    def _record_bulk_result(self, status: str, info):
+        """
+        Comptabilise le résultat ES d'un document (appelé dans l'ordre du flux)
+        
+        Args:
+            status: 'success', 'skipped' ou 'failed'
+            info: Réponse ES du document, ou message d'erreur
+        """
+        source = self._inflight_files.popleft()
+        self._bulk_counts[status] += 1
+        if status != 'failed':
+            self._last_bulk_exception = None
+            self._record_es_success()
+            return
+        
+        self._bulk_failures.setdefault(source, str(info))
+        # Requête _bulk rejetée en bloc: tous ses documents portent la même exception,
+        # comptée une seule fois (les rejets document par document ne comptent pas)
+        exception = next(iter(info.values()), {}).get('exception') if isinstance(info, dict) else None
+        if exception is not None and exception is not self._last_bulk_exception:
+            self._last_bulk_exception = exception
+            self._record_es_failure(type(exception).__name__)
+    
+    def _bulk_worker(self):
+        """Envoie le flux de documents à ES par lots de 1000 docs / 5 Mo"""
+        try:
+            counts = self.es_conn.streaming_index(
+                self._iter_queued_docs(),
+                chunk_size=1000,
+                max_chunk_bytes=5_000_000,
+                replace_existing=False,
+                auto_id=self.auto_id,
+                on_result=self._record_bulk_result
+            )
+            print(f"\n✓ {counts['success']} documents indexés avec succès")
+            if counts['skipped']:
+                print(f"ℹ {counts['skipped']} documents ignorés (déjà existants)")
+            if counts['failed']:
+                print(f"⚠ {counts['failed']} erreurs d'indexation")
+        except Exception as e:
+            print(f"\n❌ Erreur de l'indexeur bulk: {e}")
+            self.stats['errors'].append({'file': 'bulk-indexer', 'error': str(e)})
+            # Plus aucun document ne sera indexé: le coupe-circuit se déclenche
+            with self._failure_lock:
+                self._failure_streak = (type(e).__name__, MAX_CONSECUTIVE_FAILURES)
+            # Vider la file pour ne pas bloquer les producteurs: les documents
+            # non acquittés et ceux restés en file sont en échec
+            for _ in self._iter_queued_docs():
+                pass
+            while self._inflight_files:
+                self._record_bulk_result('failed', e)
+    
+    def _stop_bulk_indexer(self):
+        """Termine le flux, attend la fin de l'indexation et rafraîchit l'index"""
+        if self._doc_queue is None:
+            return
+        
+        try:
+            self._doc_queue.put(_QUEUE_END)
+            self._bulk_thread.join()
+        finally:
+            self._doc_queue = None
+            self._bulk_thread = None
+            self._reconcile_bulk_stats()
+        
+        try:
+            self.es_conn.es.indices.refresh(index=self.es_conn.index_name)
+        except Exception as e:
+            print(f"⚠ Avertissement: Impossible de rafraîchir l'index: {e}")
+    
+    def _reconcile_bulk_stats(self):
+        """
+        Remplace les statistiques provisoires (documents mis en file) par le résultat
+        réel de l'indexation: un fichier dont des documents ont échoué passe en échec
+        """
+        self.stats['documents_indexed'] = self._bulk_counts['success']
+        self.stats['index_errors'] = self._bulk_counts['failed']
+        for source, error in self._bulk_failures.items():
+            self.stats['success'] -= 1
+            self.stats['failed'] += 1
+            self.stats['errors'].append({'file': source, 'error': f"Indexation: {error}"})
+    
+    def _tune_for_bulk(self) -> Optional[Dict]:
+        """
+        Applique les réglages BULK_INDEX_SETTINGS à l'index le temps du chargement
+        
+        Returns:
+            Réglages initiaux à restaurer (None pour un réglage non défini sur l'index,
+            ce qui le ramène à sa valeur par défaut), ou None si l'index n'a pas pu être réglé
+        """
+        es, index_name = self.es_conn.es, self.es_conn.index_name
+        try:
+            current = es.indices.get_settings(
+                index=index_name, flat_settings=True
+            )[index_name].get('settings', {})
+            original = {key: current.get(key) for key in BULK_INDEX_SETTINGS}
+            
+            es.indices.put_settings(index=index_name, settings=BULK_INDEX_SETTINGS)
+            print(f"⚙️  Index '{index_name}' réglé pour le chargement de masse")
+            return original
+        except Exception as e:
+            print(f"⚠ Avertissement: Impossible de régler l'index pour le chargement: {e}")
+            return None
+    
+    def _restore_settings(self, original: Optional[Dict]):
+        """
+        Restaure les réglages initiaux de l'index
+        
+        Args:
+            original: Réglages retournés par _tune_for_bulk
+        """
+        if original is None:
+            return
+        
+        es, index_name = self.es_conn.es, self.es_conn.index_name
+        try:
+            es.indices.put_settings(index=index_name, settings=original)
+            print(f"⚙️  Réglages de l'index '{index_name}' restaurés")
+        except Exception as e:
+            print(f"⚠ Avertissement: Impossible de restaurer les réglages de l'index: {e}")
+    
+    def _forcemerge(self):
+        """Fusionne les segments de l'index en un seul (après un chargement complet)"""
+        es, index_name = self.es_conn.es, self.es_conn.index_name
+        try:
+            es.options(request_timeout=600).indices.forcemerge(
+                index=index_name, max_num_segments=1
+            )
+            print(f"⚙️  Segments de l'index '{index_name}' fusionnés")
+        except Exception as e:
+            print(f"⚠ Avertissement: Impossible de fusionner les segments de l'index: {e}")
+    
+    def _progress_bar(self, total: int) -> tqdm:
+        """Barre de progression à rafraîchissement limité (au plus ~200 affichages)"""
+        return tqdm(
+            total=total,
+            desc="Progression",
+            unit="fichier",
+            mininterval=0.5,
+            miniters=max(1, total // 200),
+            smoothing=0.05
+        )
+    
+    def _advance_progress(self, pbar: tqdm):
+        """Avance la barre d'un fichier; le postfix n'est recalculé que tous les 50 fichiers"""
+        if self.stats['total'] % 50 == 0 or self.stats['total'] == pbar.total:
+            pbar.set_postfix({
+                'Succès': self.stats['success'],
+                'Échecs': self.stats['failed'],
+                'Skippés': self.stats['skipped']
+            }, refresh=False)
+        pbar.update(1)
+    
     def process_files_sequential(self, taz_files: List[Path], skip_existing: bool = True,
                                   index_to_es: bool = True):
         """
@@ -223,18 +492,17 @@ class BatchLoader:
         print(f"\n🔄 Traitement séquentiel de {len(taz_files)} fichiers")
         print("="*80)
         
-        with tqdm(total=len(taz_files), desc="Progression", unit="fichier") as pbar:
+        with self._progress_bar(len(taz_files)) as pbar:
             for taz_file in taz_files:
                 result = self.process_single_file(taz_file, skip_existing, index_to_es)
                 self._update_stats(result)
                 
                 # Mettre à jour la barre
-                pbar.set_postfix({
-                    'Succès': self.stats['success'],
-                    'Échecs': self.stats['failed'],
-                    'Skippés': self.stats['skipped']
-                })
-                pbar.update(1)
+                self._advance_progress(pbar)
+                
+                if self._failure_threshold_reached():
+                    self._abort()
+                    break
     
     def process_files_parallel(self, taz_files: List[Path], skip_existing: bool = True,
                                 index_to_es: bool = True):
@@ -250,31 +518,148 @@ class BatchLoader:
         print(f"   Workers: {self.max_workers}")
         print("="*80)
         
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Soumettre tous les jobs
-            futures = {
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(self.transformer,),
+            thread_name_prefix='tazloader'
+        ) as executor:
+            # Fenêtre glissante de jobs en vol (2 par worker) plutôt que de tout
+            # soumettre d'un coup: mémoire bornée et pression limitée sur ES
+            files_iter = iter(taz_files)
+            pending = {
                 executor.submit(
-                    self.process_single_file, 
-                    taz_file, 
+                    self.process_single_file,
+                    taz_file,
                     skip_existing,
                     index_to_es
-                ): taz_file
-                for taz_file in taz_files
+                )
+                for taz_file in islice(files_iter, self.max_workers * 2)
             }
             
             # Barre de progression
-            with tqdm(total=len(taz_files), desc="Progression", unit="fichier") as pbar:
-                for future in as_completed(futures):
-                    result = future.result()
-                    self._update_stats(result)
+            with self._progress_bar(len(taz_files)) as pbar:
+                while pending and not self.stats['aborted']:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    # Tous les résultats terminés sont comptabilisés, même en cas d'arrêt
+                    for future in done:
+                        self._update_stats(future.result())
+                        
+                        # Mettre à jour la barre
+                        self._advance_progress(pbar)
+                    
+                    if self._failure_threshold_reached():
+                        self._abort(pending)
+                        break
                     
-                    # Mettre à jour la barre
-                    pbar.set_postfix({
-                        'Succès': self.stats['success'],
-                        'Échecs': self.stats['failed'],
-                        'Skippés': self.stats['skipped']
-                    })
-                    pbar.update(1)
+                    # Remplir la fenêtre avec les fichiers suivants
+                    for next_file in islice(files_iter, len(done)):
+                        pending.add(executor.submit(
+                            self.process_single_file,
+                            next_file,
+                            skip_existing,
+                            index_to_es
+                        ))
+    
+    def process_files_multiprocess(self, taz_files: List[Path], skip_existing: bool = True,
+                                   index_to_es: bool = True):
+        """
+        Traite les fichiers avec un pool de processus pour l'extraction
+        (décompression + parsing XML, limités par le GIL en threads),
+        l'indexation ES restant dans le processus principal
+        
+        Args:
+            taz_files: Liste des fichiers à traiter
+            skip_existing: Skip les fichiers déjà indexés
+            index_to_es: Indexer dans Elasticsearch
+        """
+        workers = min(self.max_workers, os.cpu_count() or 1, 8)
+        
+        print(f"\n🚀 Traitement multi-processus de {len(taz_files)} fichiers")
+        print(f"   Processus: {workers}")
+        print("="*80)
+        
+        # Processus démarrés en "spawn": le processus principal a déjà des threads
+        # (indexeur bulk, tqdm) et des connexions ES ouvertes, qu'un fork dupliquerait
+        # dans un état incohérent (verrous tenus, pool urllib3 partagé)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.transformer,)
+        ) as executor:
+            files_iter = iter(taz_files)
+            pending = {}
+            
+            # Barre de progression
+            with self._progress_bar(len(taz_files)) as pbar:
+                while not self.stats['aborted']:
+                    # Remplir la fenêtre de jobs (les fichiers déjà indexés sont skippés ici)
+                    while len(pending) < workers * 2:
+                        taz_file = next(files_iter, None)
+                        if taz_file is None:
+                            break
+                        if skip_existing and self.check_if_already_indexed(taz_file):
+                            result = self._new_result(taz_file)
+                            result['status'] = 'skipped'
+                            self._update_stats(result)
+                            self._advance_progress(pbar)
+                            continue
+                        future = executor.submit(_extract_docs, str(taz_file), self.transformed_dir)
+                        pending[future] = taz_file
+                    
+                    if not pending:
+                        break
+                    
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    # Tous les résultats terminés sont comptabilisés, même en cas d'arrêt
+                    for future in done:
+                        result = self._new_result(pending.pop(future))
+                        try:
+                            documents, result['duration'] = future.result()
+                            self._complete_result(result, documents, index_to_es)
+                        except Exception as e:
+                            self._fail_result(result, e)
+                        self._update_stats(result)
+                        
+                        # Mettre à jour la barre
+                        self._advance_progress(pbar)
+                    
+                    if self._failure_threshold_reached():
+                        self._abort(pending)
+    
+    def _record_es_failure(self, kind: str):
+        """
+        Compte un échec Elasticsearch (appelé depuis les workers et le thread bulk):
+        la série ne s'allonge que si l'échec est de même nature que le précédent
+        """
+        with self._failure_lock:
+            last_kind, count = self._failure_streak
+            if count >= MAX_CONSECUTIVE_FAILURES:
+                return
+            self._failure_streak = (kind, count + 1 if kind == last_kind else 1)
+    
+    def _record_es_success(self):
+        """Remet à zéro la série d'échecs Elasticsearch après une réponse valide"""
+        with self._failure_lock:
+            if self._failure_streak[1] < MAX_CONSECUTIVE_FAILURES:
+                self._failure_streak = (None, 0)
+    
+    def _failure_threshold_reached(self) -> bool:
+        """
+        Returns:
+            True si MAX_CONSECUTIVE_FAILURES échecs Elasticsearch identiques se sont succédé
+        """
+        with self._failure_lock:
+            return self._failure_streak[1] >= MAX_CONSECUTIVE_FAILURES
+    
+    def _abort(self, pending=()):
+        """Interrompt le traitement: annule les jobs en attente et marque le run comme avorté"""
+        kind, count = self._failure_streak
+        print(f"\n🛑 {count} échecs Elasticsearch consécutifs ({kind}): arrêt du traitement")
+        for future in pending:
+            future.cancel()
+        self.stats['aborted'] = True
     
     def _update_stats(self, result: Dict):
         """Met à jour les statistiques avec le résultat d'un fichier"""
@@ -293,7 +678,8 @@ class BatchLoader:
             self.stats['skipped'] += 1
     
     def run(self, base_dir: str, parallel: bool = False, skip_existing: bool = True,
-            years: List[str] = None, index_to_es: bool = True) -> Dict:
+            years: List[str] = None, index_to_es: bool = True,
+            procs: bool = False, forcemerge: bool = False) -> Dict:
         """
         Lance le chargement de masse
         
@@ -303,12 +689,17 @@ class BatchLoader:
             skip_existing: Si True, skip les fichiers déjà indexés
             years: Liste des années à traiter (None = toutes)
             index_to_es: Si True, indexe dans Elasticsearch
+            procs: Si True, extrait les fichiers dans un pool de processus
+            forcemerge: Si True, fusionne les segments de l'index en fin de chargement
+                        (coûteux: à réserver aux chargements complets)
             
         Returns:
             Statistiques du traitement
         """
         # Reset stats
         self.stats = self._init_stats()
+        self._failure_streak = (None, 0)
+        self._last_bulk_exception = None
         self.stats['start_time'] = datetime.now()
         
         print(f"\n{'='*80}")
@@ -317,8 +708,8 @@ class BatchLoader:
         print(f"📁 Répertoire: {base_dir}")
         print(f"🔍 Recherche des fichiers TAZ...")
         
-        # Trouver tous les fichiers
-        taz_files = self.find_taz_files(base_dir)
+        # Trouver tous les fichiers (et les organiser par année)
+        taz_files, by_year = self.scan_and_group(base_dir)
         
         if not taz_files:
             print(f"❌ Aucun fichier TAZ trouvé dans {base_dir}")
@@ -326,9 +717,6 @@ class BatchLoader:
         
         print(f"✅ {len(taz_files)} fichiers TAZ trouvés")
         
-        # Organiser par année
-        by_year = self.organize_files_by_year(taz_files)
-        
         print(f"\n📊 Répartition par année:")
         for year in sorted(by_year.keys()):
             print(f"   • {year}: {len(by_year[year])} fichiers")
@@ -347,10 +735,26 @@ class BatchLoader:
             return self.stats
         
         # Traiter les fichiers
-        if parallel:
-            self.process_files_parallel(taz_files, skip_existing, index_to_es)
-        else:
-            self.process_files_sequential(taz_files, skip_existing, index_to_es)
+        original_settings = None
+        if index_to_es:
+            original_settings = self._tune_for_bulk()
+            self._start_bulk_indexer()
+        try:
+            if procs:
+                self.process_files_multiprocess(taz_files, skip_existing, index_to_es)
+            elif parallel:
+                self.process_files_parallel(taz_files, skip_existing, index_to_es)
+            else:
+                self.process_files_sequential(taz_files, skip_existing, index_to_es)
+        finally:
+            # Les réglages sont restaurés même si l'arrêt de l'indexeur échoue
+            try:
+                self._stop_bulk_indexer()
+            finally:
+                self._restore_settings(original_settings)
+        
+        if forcemerge and index_to_es and self.stats['documents_indexed'] > 0:
+            self._forcemerge()
         
         self.stats['end_time'] = datetime.now()
         
@@ -370,11 +774,17 @@ class BatchLoader:
         print(f"📊 RÉSUMÉ DU TRAITEMENT")
         print(f"{'='*80}")
         print(f"⏱️  Durée totale: {duration:.2f} secondes ({duration/60:.1f} minutes)")
+        total = max(self.stats['total'], 1)
+        
         print(f"📁 Total de fichiers: {self.stats['total']}")
-        print(f"✅ Succès: {self.stats['success']} ({self.stats['success']/max(self.stats['total'],1)*100:.1f}%)")
-        print(f"⏭️  Skippés: {self.stats['skipped']} ({self.stats['skipped']/max(self.stats['total'],1)*100:.1f}%)")
-        print(f"❌ Échecs: {self.stats['failed']} ({self.stats['failed']/max(self.stats['total'],1)*100:.1f}%)")
+        print(f"✅ Succès: {self.stats['success']} ({self.stats['success']/total*100:.1f}%)")
+        print(f"⏭️  Skippés: {self.stats['skipped']} ({self.stats['skipped']/total*100:.1f}%)")
+        print(f"❌ Échecs: {self.stats['failed']} ({self.stats['failed']/total*100:.1f}%)")
         print(f"📄 Documents indexés: {self.stats['documents_indexed']}")
+        if self.stats['index_errors']:
+            print(f"⚠️  Erreurs d'indexation: {self.stats['index_errors']}")
+        if self.stats['aborted']:
+            print(f"🛑 Traitement interrompu après {MAX_CONSECUTIVE_FAILURES} échecs Elasticsearch consécutifs (rapport partiel)")
         
         if self.stats['success'] > 0:
             avg_time = duration / self.stats['success']
@@ -406,29 +816,33 @@ class BatchLoader:
                 'success': self.stats['success'],
                 'failed': self.stats['failed'],
                 'skipped': self.stats['skipped'],
-                'documents_indexed': self.stats['documents_indexed']
+                'documents_indexed': self.stats['documents_indexed'],
+                'index_errors': self.stats['index_errors'],
+                'aborted': self.stats['aborted']
             },
             'errors': self.stats['errors']
         }
         existing_runs = []
         if os.path.exists(output_file):
             try:
-                with open(output_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, dict) and 'runs' in data:
-                        existing_runs = data['runs']
-                    elif isinstance(data, dict):
-                        existing_runs = [data]
-                    elif isinstance(data, list):
-                        existing_runs = data
-            except (json.JSONDecodeError, IOError) as e:
+                data = orjson.loads(Path(output_file).read_bytes())
+                if isinstance(data, dict) and 'runs' in data:
+                    existing_runs = data['runs']
+                elif isinstance(data, dict):
+                    existing_runs = [data]
+                elif isinstance(data, list):
+                    existing_runs = data
+            except (orjson.JSONDecodeError, IOError) as e:
                 print(f"⚠ Avertissement: Impossible de lire le fichier existant {output_file}: {e}")
         
         existing_runs.append(report)
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump({'runs': existing_runs}, f, indent=2, ensure_ascii=False)
-        
+        # Écriture atomique: fichier temporaire puis remplacement
+        tmp_file = output_file + '.tmp'
+        Path(tmp_file).write_bytes(
+            orjson.dumps({'runs': existing_runs}, option=orjson.OPT_INDENT_2)
+        )
+        os.replace(tmp_file, output_file)
         
         print(f"💾 Rapport sauvegardé: {output_file}")
 
@@ -446,6 +860,9 @@ Exemples d'utilisation:
   # Charger en parallèle avec 4 workers
   python load_batch.py data/raw/ --parallel --workers 4
   
+  # Extraire sur 4 processus (décompression/parsing XML)
+  python load_batch.py data/raw/ --procs --workers 4
+  
   # Charger seulement 2022 et 2023
   python load_batch.py data/raw/ --years 2022 2023
   
@@ -457,6 +874,9 @@ Exemples d'utilisation:
   
   # Transformer seulement (pas d'indexation ES)
   python load_batch.py data/raw/ --no-index
+  
+  # Chargement complet suivi d'une fusion des segments
+  python load_batch.py data/raw/ --create-index --forcemerge
         """
     )
     
@@ -479,6 +899,12 @@ Exemples d'utilisation:
         help='Activer le traitement parallèle'
     )
     
+    parser.add_argument(
+        '--procs',
+        action='store_true',
+        help='Extraire les fichiers dans un pool de processus (indexation dans le processus principal)'
+    )
+    
     parser.add_argument(
         '--workers',
         type=int,
@@ -492,6 +918,12 @@ Exemples d'utilisation:
         help='Ne pas skipper les fichiers déjà indexés'
     )
     
+    parser.add_argument(
+        '--auto-id',
+        action='store_true',
+        help='Laisser Elasticsearch générer les _id (plus rapide, sans déduplication par para_id)'
+    )
+    
     parser.add_argument(
         '--years',
         nargs='+',
@@ -517,6 +949,12 @@ Exemples d'utilisation:
         help='Ne pas indexer dans Elasticsearch (transformation seulement)'
     )
     
+    parser.add_argument(
+        '--forcemerge',
+        action='store_true',
+        help='Fusionner les segments de l\'index en fin de chargement (chargements complets)'
+    )
+    
     parser.add_argument(
         '--output-dir',
         type=str,
@@ -539,8 +977,7 @@ Exemples d'utilisation:
             max_workers=args.workers,
             transformed_dir=args.output_dir
         )
-        taz_files = loader.find_taz_files(args.base_dir)
-        by_year = loader.organize_files_by_year(taz_files)
+        taz_files, by_year = loader.scan_and_group(args.base_dir)
         
         print(f"📁 Répertoire: {args.base_dir}")
         print(f"📊 {len(taz_files)} fichiers TAZ trouvés\n")
@@ -568,7 +1005,8 @@ Exemples d'utilisation:
     loader = BatchLoader(
         es_conn=es_conn,
         max_workers=args.workers,
-        transformed_dir=args.output_dir
+        transformed_dir=args.output_dir,
+        auto_id=args.auto_id
     )
     
     loader.run(
@@ -576,7 +1014,9 @@ Exemples d'utilisation:
         parallel=args.parallel,
         skip_existing=not args.no_skip,
         years=args.years,
-        index_to_es=not args.no_index
+        index_to_es=not args.no_index,
+        procs=args.procs,
+        forcemerge=args.forcemerge
     )
 
 
@@ -2,10 +2,14 @@
 Test rapide : compter les interventions dans un XML et les comparer aux stats Elasticsearch
 """
 
-import xml.etree.ElementTree as ET
+from collections import Counter
 from pathlib import Path
+from lxml import etree
 from load2 import ANDebatsExtractor
 
+# Comptage des Para évalué entièrement en C par libxml2
+_PARA_COUNT = etree.XPath('count(//Para)')
+
 
 def count_interventions_in_xml(xml_path: str) -> int:
     """
@@ -17,13 +21,7 @@ def count_interventions_in_xml(xml_path: str) -> int:
     Returns:
         Nombre total de Para trouvés
     """
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-    
-    # Compter tous les Para (interventions) dans le document
-    para_count = len(root.findall('.//Para'))
-    
-    return para_count
+    return int(_PARA_COUNT(etree.parse(xml_path)))
 
 
 def test_intervention_count(taz_path: str):
@@ -48,7 +46,7 @@ def test_intervention_count(taz_path: str):
         return
     
     # Compter les Para directement
-    xml_para_count = len(root.findall('.//Para'))
+    xml_para_count = sum(1 for _ in root.iter('Para'))
     print(f"✓ Nombre total de <Para> dans le XML: {xml_para_count}")
     
     # Extraire les métadonnées
@@ -72,8 +70,9 @@ def test_intervention_count(taz_path: str):
         signature=signature
     )
     
-    # Compter les interventions extraites
-    intervention_count = len([d for d in documents if d.get('type_document') == 'intervention'])
+    # Compter les documents par type en un seul passage
+    type_counts = Counter(doc.get('type_document', 'unknown') for doc in documents)
+    intervention_count = type_counts.get('intervention', 0)
     
     print(f"✓ Nombre d'interventions extraites: {intervention_count}")
     
@@ -88,11 +87,6 @@ def test_intervention_count(taz_path: str):
     
     # Détails des documents extraits
     print(f"\n📋 Répartition des {len(documents)} documents extraits:")
-    type_counts = {}
-    for doc in documents:
-        doc_type = doc.get('type_document', 'unknown')
-        type_counts[doc_type] = type_counts.get(doc_type, 0) + 1
-    
     for doc_type, count in sorted(type_counts.items()):
         print(f"  - {doc_type}: {count}")
     
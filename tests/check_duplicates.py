@@ -2,9 +2,26 @@
 Script pour identifier et afficher les données dupliquées dans le fichier JSON transformé
 """
 
+import os
 import json
+import hashlib
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter, defaultdict
+
+import ijson
+import orjson
+
+
+def _iter_items(json_path):
+    """Parcourt les éléments du tableau JSON un par un (sans tout charger en mémoire)"""
+    with open(json_path, "rb") as f:
+        yield from ijson.items(f, "item", use_float=True)
+
+
+def _empreinte(item):
+    """Empreinte du contenu d'une entrée (deux entrées identiques ont la même empreinte)"""
+    data = json.dumps(item, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).digest()
 
 
 def analyser_doublons(json_path):
@@ -14,26 +31,28 @@ def analyser_doublons(json_path):
     Args:
         json_path: Chemin vers le fichier JSON
     """
-    # Charger les données
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    # Grouper par para_id
-    para_id_groups = defaultdict(list)
+    # Premier passage: compter les occurrences de chaque para_id
+    total_items = 0
+    para_id_counts = Counter()
 
-    for idx, item in enumerate(data):
+    for item in _iter_items(json_path):
+        total_items += 1
         para_id = item.get("para_id")
         if para_id:
-            para_id_groups[para_id].append({"index": idx, "item": item})
+            para_id_counts[para_id] += 1
 
-    # Trouver les doublons
-    doublons = {
-        pid: entries for pid, entries in para_id_groups.items() if len(entries) > 1
-    }
+    # Second passage: ne garder en mémoire que les entrées dupliquées
+    doublons = defaultdict(list)
+
+    for idx, item in enumerate(_iter_items(json_path)):
+        para_id = item.get("para_id")
+        if para_id and para_id_counts[para_id] > 1:
+            doublons[para_id].append(
+                {"index": idx, "item": item, "h": _empreinte(item)}
+            )
 
     # Statistiques
-    total_items = len(data)
-    total_unique = len(para_id_groups)
+    total_unique = len(para_id_counts)
     total_doublons = len(doublons)
     total_duplicated_entries = sum(len(entries) for entries in doublons.values())
 
@@ -75,7 +94,7 @@ def analyser_doublons(json_path):
                 # Vérifier si les contenus sont identiques
                 if j > 1:
                     prev_item = entries[j - 2]["item"]
-                    if item == prev_item:
+                    if entry["h"] == entries[j - 2]["h"]:
                         print(f"   ⚠️  IDENTIQUE à l'occurrence précédente")
                     else:
                         differences = []
@@ -99,9 +118,8 @@ def analyser_doublons(json_path):
         doublons_differents = 0
 
         for para_id, entries in doublons.items():
-            # Comparer toutes les occurrences
-            items = [e["item"] for e in entries]
-            if all(item == items[0] for item in items):
+            # Comparer toutes les occurrences via leurs empreintes
+            if len({e["h"] for e in entries}) == 1:
                 doublons_identiques += 1
             else:
                 doublons_differents += 1
@@ -132,8 +150,10 @@ def sauvegarder_doublons(doublons, output_path):
             {"index": e["index"], "data": e["item"]} for e in entries
         ]
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(doublons_json, f, indent=2, ensure_ascii=False)
+    # Écriture atomique: fichier temporaire puis remplacement
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    tmp_path.write_bytes(orjson.dumps(doublons_json, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, output_path)
 
     print(f"💾 Doublons sauvegardés dans: {output_path.name}")
 
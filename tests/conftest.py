@@ -0,0 +1,59 @@
+"""
+Fixtures et configuration partagées par les tests PyTest
+
+Exécution parallèle (pytest-xdist) : pytest -n auto --dist loadgroup
+Les tests Elasticsearch, en lecture seule, se répartissent librement entre
+les workers ; les tests de sentiment sont regroupés (xdist_group "gpu") sur
+un seul worker, qui est le seul à charger le modèle.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Racine du dépôt dans le path pour importer le paquet src
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def pytest_configure(config):
+    """Configuration des markers pytest"""
+    config.addinivalue_line(
+        "markers", "slow: marks tests as slow (deselect with '-m \"not slow\"')"
+    )
+    config.addinivalue_line(
+        "markers", "integration: marks tests as integration tests"
+    )
+    config.addinivalue_line(
+        "markers", "xdist_group(name): regroupe les tests sur un même worker pytest-xdist"
+    )
+    # Scores détaillés (logging INFO) affichés en direct uniquement en mode verbeux,
+    # sauf si un niveau a été demandé explicitement
+    if config.getoption("verbose") > 0 and config.getoption("log_cli_level") is None:
+        config.option.log_cli_level = "INFO"
+
+
+@pytest.fixture(scope="session")
+def model_tokenizer():
+    """
+    Modèle de sentiment et tokenizer, chargés une seule fois par session
+    (import différé : les tests Elasticsearch n'ont pas besoin de torch).
+    Sans GPU, le modèle est quantifié en int8 pour accélérer les tests.
+    """
+    from src.analysis.positivity_evolution import load_model
+
+    model, tokenizer = load_model(quantize=True)
+    model.eval()
+    return model, tokenizer
+
+
+@pytest.fixture(scope="session")
+def model(model_tokenizer):
+    """Modèle de sentiment (mode évaluation)"""
+    return model_tokenizer[0]
+
+
+@pytest.fixture(scope="session")
+def tokenizer(model_tokenizer):
+    """Tokenizer associé au modèle de sentiment"""
+    return model_tokenizer[1]
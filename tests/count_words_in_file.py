@@ -4,59 +4,163 @@ Script pour compter le nombre total de mots dans tous les champs 'texte'
 d'un fichier JSON.
 """
 
-import json
+import os
 import sys
 from pathlib import Path
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import ijson
+import numpy as np
+import orjson
+
+# Table des points de code blancs au sens de str.isspace() (le plus grand est U+3000) ;
+# la dernière case, toujours False, absorbe tous les points de code supérieurs
+_WS_TABLE = np.zeros(0x3002, dtype=bool)
+_WS_TABLE[[c for c in range(0x3001) if chr(c).isspace()]] = True
+_WS_SENTINEL = len(_WS_TABLE) - 1
+
+# En dessous de cette longueur, l'encodage vers numpy coûte plus qu'il ne rapporte
+VECTORIZE_MIN_LENGTH = 4096
+
+# Au-delà de cette taille, le fichier est lu en flux plutôt que chargé d'un bloc
+STREAMING_THRESHOLD = 512 * 1024 * 1024
+
+# En dessous de cette taille, le démarrage des processus coûte plus que le comptage
+PARALLEL_MIN_SIZE = 32 * 1024 * 1024
+BATCH_SIZE = 10_000
+
+
+def _count_words_vectorized(text):
+    """
+    Compte les mots d'un long texte en une passe vectorisée : un mot commence
+    sur chaque caractère non blanc qui suit un blanc (ou ouvre le texte).
+    """
+    codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    blancs = _WS_TABLE[np.minimum(codes, _WS_SENTINEL)]
+    debuts = ~blancs
+    debuts[1:] &= blancs[:-1]
+    return int(np.count_nonzero(debuts))
 
 
 def count_words_in_text(text):
     """Compte le nombre de mots dans un texte."""
     if not text or not isinstance(text, str):
         return 0
-    # Divise par espaces et filtre les chaînes vides
-    return len([word for word in text.split() if word.strip()])
+    if len(text) >= VECTORIZE_MIN_LENGTH:
+        return _count_words_vectorized(text)
+    return len(text.split())
 
 
-def count_words_in_file(file_path):
+def _iter_docs(path):
     """
-    Compte le nombre total de mots dans tous les champs 'texte' d'un fichier JSON.
+    Parcourt les documents d'un tableau JSON. Les fichiers raisonnables sont
+    lus d'un seul read() et décodés par orjson ; au-delà de STREAMING_THRESHOLD,
+    ils sont parcourus en flux via ijson pour ne pas tout charger en mémoire.
     
     Args:
-        file_path: Chemin vers le fichier JSON
+        path: Chemin vers le fichier JSON
         
-    Returns:
-        Tuple (nombre_total_mots, nombre_documents)
+    Yields:
+        Chaque élément du tableau racine
     """
-    file_path = Path(file_path)
-    
-    if not file_path.exists():
-        raise FileNotFoundError(f"Le fichier {file_path} n'existe pas")
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    path = Path(path)
+    if path.stat().st_size <= STREAMING_THRESHOLD:
+        data = orjson.loads(path.read_bytes())
+        if not isinstance(data, list):
+            raise ValueError("Le fichier JSON doit contenir une liste de documents")
+        yield from data
+        return
     
-    if not isinstance(data, list):
-        raise ValueError("Le fichier JSON doit contenir une liste de documents")
+    with open(path, 'rb') as f:
+        if f.read(64).lstrip()[:1] != b'[':
+            raise ValueError("Le fichier JSON doit contenir une liste de documents")
+        f.seek(0)
+        yield from ijson.items(f, 'item', use_float=True)
+
+
+def _count_batch(docs):
+    """
+    Compte les mots d'un lot de documents.
     
+    Args:
+        docs: Itérable de documents JSON
+        
+    Returns:
+        Tuple (nombre_total_mots, nombre_documents, documents_sans_texte)
+    """
     total_words = 0
     total_documents = 0
     documents_without_text = 0
+    _cw = count_words_in_text  # alias local : évite un LOAD_GLOBAL par document
     
-    for doc in data:
-        if not isinstance(doc, dict):
+    for doc in docs:
+        # Les objets JSON sont toujours décodés en dict exact
+        if type(doc) is not dict:
             continue
             
         total_documents += 1
         
-        if 'texte' in doc and doc['texte']:
-            words = count_words_in_text(doc['texte'])
-            total_words += words
+        texte = doc.get('texte')
+        if texte:
+            total_words += _cw(texte)
         else:
             documents_without_text += 1
     
     return total_words, total_documents, documents_without_text
 
 
+def _iter_batches(docs, size):
+    """Découpe un itérable de documents en listes de `size` éléments."""
+    docs = iter(docs)
+    while batch := list(islice(docs, size)):
+        yield batch
+
+
+def count_words_in_file(file_path, workers=None):
+    """
+    Compte le nombre total de mots dans tous les champs 'texte' d'un fichier JSON.
+    
+    Les gros fichiers sont découpés en lots de BATCH_SIZE documents comptés
+    dans des processus séparés (le comptage est limité par le GIL).
+    
+    Args:
+        file_path: Chemin vers le fichier JSON
+        workers: Nombre de processus (défaut: os.cpu_count(), 1 = séquentiel)
+        
+    Returns:
+        Tuple (nombre_total_mots, nombre_documents, documents_sans_texte)
+    """
+    file_path = Path(file_path)
+    
+    if not file_path.exists():
+        raise FileNotFoundError(f"Le fichier {file_path} n'existe pas")
+    
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or file_path.stat().st_size < PARALLEL_MIN_SIZE:
+        return _count_batch(_iter_docs(file_path))
+    
+    totals = [0, 0, 0]
+    
+    def collect(futures):
+        for future in futures:
+            for i, value in enumerate(future.result()):
+                totals[i] += value
+    
+    # Fenêtre bornée de lots en vol : en lecture en flux, le fichier
+    # n'est jamais entièrement en mémoire
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for batch in _iter_batches(_iter_docs(file_path), BATCH_SIZE):
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(_count_batch, batch))
+        collect(pending)
+    
+    return tuple(totals)
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python count_words_in_file.py <chemin_vers_fichier.json>")
@@ -4,10 +4,20 @@ Compare les identifiants idsyceron des Para du XML brut avec les para_id du JSON
 """
 
 import sys
-import json
-import xml.etree.ElementTree as ET
+import pickle
+import hashlib
+try:
+    from lxml import etree as ET
+except ImportError:  # repli sur la bibliothèque standard
+    import xml.etree.ElementTree as ET
 from pathlib import Path
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+
+# Cache disque des identifiants extraits (même répertoire que le cache de scan du batch loader)
+CACHE_DIR = Path.home() / ".cache" / "datadebat"
 
 # Ajouter le répertoire src au path pour importer transform
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
@@ -71,6 +81,11 @@ def extraire_idsyceron_depuis_taz(taz_path):
     return extraire_idsyceron_root(root)
 
 
+def _loads(path):
+    """Charge un fichier JSON en une seule lecture binaire via orjson."""
+    return orjson.loads(Path(path).read_bytes())
+
+
 def extraire_para_id_json(json_path):
     """
     Extrait tous les para_id du fichier JSON transformé
@@ -81,8 +96,7 @@ def extraire_para_id_json(json_path):
     Returns:
         Liste des para_id trouvés
     """
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = _loads(json_path)
 
     para_id_list = []
 
@@ -99,6 +113,42 @@ def extraire_para_id_json(json_path):
     return para_id_list
 
 
+def extraire_avec_cache(extraction, path):
+    """
+    Exécute une extraction en réutilisant son résultat tant que le fichier source
+    n'a pas changé (clé : chemin absolu, st_mtime_ns et st_size).
+
+    Args:
+        extraction: Fonction d'extraction prenant le chemin en argument
+        path: Chemin vers le fichier source
+
+    Returns:
+        Résultat de l'extraction (depuis le cache si valide)
+    """
+    path = Path(path)
+    stat = path.stat()
+    cle = hashlib.sha256(
+        f"{extraction.__name__}|{path.resolve()}|{stat.st_mtime_ns}|{stat.st_size}".encode("utf-8")
+    ).hexdigest()[:16]
+    cache_file = CACHE_DIR / f"ids_{cle}.pkl"
+
+    if cache_file.exists():
+        try:
+            return pickle.loads(cache_file.read_bytes())
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            pass
+
+    resultat = extraction(path)
+    # Ne pas figer un échec d'extraction
+    if resultat:
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            cache_file.write_bytes(pickle.dumps(resultat, protocol=pickle.HIGHEST_PROTOCOL))
+        except OSError as e:
+            print(f"⚠ Impossible d'écrire le cache {cache_file}: {e}")
+    return resultat
+
+
 def comparer_ids(xml_ids, json_ids):
     """
     Compare les deux listes d'identifiants
@@ -110,26 +160,31 @@ def comparer_ids(xml_ids, json_ids):
     Returns:
         Dictionnaire avec les résultats de la comparaison
     """
-    # Extraire juste les IDs
-    xml_id_set = set(item["id"] for item in xml_ids)
-    json_id_set = set(item["id"] for item in json_ids)
+    # Compter les occurrences et indexer les infos par ID en un seul passage :
+    # les clés du Counter forment directement l'ensemble des IDs uniques
+    xml_counts, xml_by_id = Counter(), {}
+    for item in xml_ids:
+        xml_counts[item["id"]] += 1
+        xml_by_id[item["id"]] = item
+    json_counts, json_by_id = Counter(), {}
+    for item in json_ids:
+        json_counts[item["id"]] += 1
+        json_by_id[item["id"]] = item
+    xml_id_set = xml_counts.keys()
+    json_id_set = json_counts.keys()
 
     # Calculer les différences
     manquants_json = xml_id_set - json_id_set  # IDs dans XML mais pas dans JSON
     en_trop_json = json_id_set - xml_id_set  # IDs dans JSON mais pas dans XML
     communs = xml_id_set & json_id_set  # IDs présents dans les deux
 
-    # Compter les occurrences (pour détecter les doublons)
-    xml_counts = Counter(item["id"] for item in xml_ids)
-    json_counts = Counter(item["id"] for item in json_ids)
-
     # Trouver les doublons
     doublons_xml = {id: count for id, count in xml_counts.items() if count > 1}
     doublons_json = {id: count for id, count in json_counts.items() if count > 1}
 
     return {
-        "total_xml": len(xml_ids),
-        "total_json": len(json_ids),
+        "total_xml": sum(xml_counts.values()),
+        "total_json": sum(json_counts.values()),
         "total_unique_xml": len(xml_id_set),
         "total_unique_json": len(json_id_set),
         "communs": len(communs),
@@ -137,17 +192,17 @@ def comparer_ids(xml_ids, json_ids):
         "en_trop_json": sorted(en_trop_json),
         "doublons_xml": doublons_xml,
         "doublons_json": doublons_json,
+        "xml_by_id": xml_by_id,
+        "json_by_id": json_by_id,
     }
 
 
-def afficher_comparaison(comparaison, xml_ids, json_ids):
+def afficher_comparaison(comparaison):
     """
     Affiche les résultats de la comparaison de manière lisible
 
     Args:
-        comparaison: Résultats de la comparaison
-        xml_ids: Liste des idsyceron du XML
-        json_ids: Liste des para_id du JSON
+        comparaison: Résultats de la comparaison (issus de comparer_ids)
     """
     print("\n" + "=" * 80)
     print("COMPARAISON DES IDSYCERON")
@@ -180,8 +235,7 @@ def afficher_comparaison(comparaison, xml_ids, json_ids):
         )
         print(f"   (présents dans XML mais absents du JSON transformé)")
 
-        # Créer un dictionnaire pour retrouver les infos
-        xml_dict = {item["id"]: item for item in xml_ids}
+        xml_dict = comparaison["xml_by_id"]
 
         for id in comparaison["manquants_json"][:20]:  # Limiter à 20 pour l'affichage
             info = xml_dict.get(id, {})
@@ -197,8 +251,7 @@ def afficher_comparaison(comparaison, xml_ids, json_ids):
         print(f"\n⚠️  IDs EN TROP dans le JSON ({len(comparaison['en_trop_json'])}):")
         print(f"   (présents dans JSON mais absents du XML brut)")
 
-        # Créer un dictionnaire pour retrouver les infos
-        json_dict = {item["id"]: item for item in json_ids}
+        json_dict = comparaison["json_by_id"]
 
         for id in comparaison["en_trop_json"][:20]:  # Limiter à 20
             info = json_dict.get(id, {})
@@ -233,18 +286,22 @@ if __name__ == "__main__":
     print(f"Extraction des idsyceron depuis le TAZ: {taz_path.name}")
     print(f"Extraction des para_id depuis le JSON: {json_path.name}")
 
-    # Extraire les IDs depuis le TAZ (XML contenu dans le .taz)
-    xml_ids = extraire_idsyceron_depuis_taz(taz_path)
-    if not xml_ids:
-        print("⚠ Impossible d'extraire le XML du TAZ ou aucun idsyceron trouvé. Vérifiez le chemin du TAZ.")
-        raise SystemExit(1)
-    json_ids = extraire_para_id_json(json_path)
+    # Extraire les IDs du TAZ (XML contenu dans le .taz) et du JSON en parallèle :
+    # les deux lectures sont indépendantes
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        future_xml = executor.submit(extraire_avec_cache, extraire_idsyceron_depuis_taz, taz_path)
+        future_json = executor.submit(extraire_avec_cache, extraire_para_id_json, json_path)
+        xml_ids = future_xml.result()
+        if not xml_ids:
+            print("⚠ Impossible d'extraire le XML du TAZ ou aucun idsyceron trouvé. Vérifiez le chemin du TAZ.")
+            raise SystemExit(1)
+        json_ids = future_json.result()
 
     # Comparer
     comparaison = comparer_ids(xml_ids, json_ids)
 
     # Afficher les résultats
-    afficher_comparaison(comparaison, xml_ids, json_ids)
+    afficher_comparaison(comparaison)
 
     # Sauvegarder le rapport détaillé
     rapport = {
@@ -272,8 +329,9 @@ if __name__ == "__main__":
     }
 
     output_path = Path(__file__).parent / "comparaison_idsyceron.json"
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(rapport, f, indent=2, ensure_ascii=False)
+    output_path.write_bytes(
+        orjson.dumps(rapport, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    )
 
     print(f"\n💾 Rapport détaillé sauvegardé dans: {output_path.name}")
     print("=" * 80)
@@ -0,0 +1,67 @@
+"""
+Tests de ESConnection sans serveur Elasticsearch (client factice).
+Lancer avec: pytest tests/test_es_connection.py
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from db.es_connection import ESConnection
+
+
+class FakeES:
+    """Client factice: search retourne une agrégation par année et compte les appels"""
+
+    def __init__(self):
+        self.searches = 0
+
+    def search(self, **kwargs):
+        self.searches += 1
+        return {
+            "aggregations": {"by_year": {"buckets": [
+                {"key": 2022, "doc_count": 10, "unique_para_id": {"value": 8}},
+                {"key": 2023, "doc_count": 5, "unique_para_id": {"value": 5}},
+            ]}}
+        }
+
+
+@pytest.fixture
+def es_conn():
+    """ESConnection sans __init__ (pas de ping), branchée sur le client factice"""
+    conn = ESConnection.__new__(ESConnection)
+    conn.es = FakeES()
+    conn.index_name = "test_index"
+    conn._query_cache = {}
+    return conn
+
+
+def test_cached_stats_are_equal_and_independent(es_conn):
+    """Un appel servi par le cache retourne les mêmes données, dans des objets distincts"""
+    first = es_conn.get_stats_by_year()
+    first[0]["nb_interventions"] = -1
+    first.append({"annee": 1900})
+
+    second = es_conn.get_stats_by_year()
+    third = es_conn.get_stats_by_year()
+
+    assert es_conn.es.searches == 1
+    assert second == third == [
+        {"annee": 2022, "nb_interventions": 10, "nb_para_id_uniques": 8},
+        {"annee": 2023, "nb_interventions": 5, "nb_para_id_uniques": 5},
+    ]
+    assert second is not third
+    assert second[0] is not third[0]
+
+
+def test_build_action_does_not_modify_document(es_conn):
+    """texte_length est ajouté à l'action, pas au document de l'appelant"""
+    doc = {"para_id": "p1", "texte": "Bonjour"}
+    action = es_conn._build_action(doc, replace_existing=False)
+
+    assert doc == {"para_id": "p1", "texte": "Bonjour"}
+    assert action["_source"] == {"para_id": "p1", "texte": "Bonjour", "texte_length": 7}
+    assert action["_id"] == "p1"
+    assert action["_op_type"] == "create"
@@ -0,0 +1,265 @@
+"""
+Tests du BatchLoader (indexeur bulk en arrière-plan, réconciliation des statistiques).
+Lancer avec: pytest tests/test_load_batch.py
+Aucun serveur Elasticsearch n'est nécessaire : le client et helpers.streaming_bulk
+sont remplacés par des doublures.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# load_batch importe ses modules depuis src (db.es_connection, etl.transform)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from elasticsearch.exceptions import ConnectionError, ConnectionTimeout
+
+from db import es_connection
+from db.es_connection import ESConnection
+from etl.load_batch import BatchLoader, MAX_CONSECUTIVE_FAILURES
+
+
+class FakeIndices:
+    """API indices minimale: enregistre les appels"""
+
+    def __init__(self):
+        self.calls = []
+
+    def refresh(self, **kwargs):
+        self.calls.append("refresh")
+
+
+class FakeES:
+    """Client Elasticsearch factice (aucune requête réseau)"""
+
+    def __init__(self):
+        self.indices = FakeIndices()
+
+    def options(self, **kwargs):
+        return self
+
+    def count(self, **kwargs):
+        return {"count": 0}
+
+
+@pytest.fixture
+def es_conn():
+    """ESConnection sans __init__ (pas de ping), branchée sur le client factice"""
+    conn = ESConnection.__new__(ESConnection)
+    conn.es = FakeES()
+    conn.index_name = "test_index"
+    conn._query_cache = {}
+    return conn
+
+
+def stub_streaming_bulk(monkeypatch, outcome):
+    """
+    Remplace helpers.streaming_bulk: chaque action reçoit outcome(document),
+    qui retourne le couple (ok, info) ou lève une exception
+    """
+    def streaming_bulk(client, actions, **kwargs):
+        for action in actions:
+            yield outcome(action["_source"])
+
+    monkeypatch.setattr(es_connection.helpers, "streaming_bulk", streaming_bulk)
+
+
+def index_files(loader, files):
+    """Fait passer des fichiers {nom: documents} par l'indexeur bulk et retourne les stats"""
+    loader._start_bulk_indexer()
+    try:
+        for name, documents in files.items():
+            result = loader._new_result(Path(name))
+            loader._complete_result(result, documents, index_to_es=True)
+            loader._update_stats(result)
+    finally:
+        loader._stop_bulk_indexer()
+    return loader.stats
+
+
+def test_bulk_failures_are_reconciled_per_file(es_conn, monkeypatch):
+    """Un fichier dont un document est rejeté par ES passe en échec"""
+    def outcome(doc):
+        if doc["texte"] == "bad":
+            return False, {"create": {"status": 400, "error": {"type": "mapper_parsing_exception"}}}
+        return True, {"create": {"status": 201}}
+
+    stub_streaming_bulk(monkeypatch, outcome)
+    stats = index_files(BatchLoader(es_conn=es_conn), {
+        "AN_2022001.taz": [{"texte": "ok"}, {"texte": "ok"}],
+        "AN_2022002.taz": [{"texte": "ok"}, {"texte": "bad"}],
+    })
+
+    assert (stats["success"], stats["failed"]) == (1, 1)
+    assert stats["documents_indexed"] == 3
+    assert stats["index_errors"] == 1
+    assert [e["file"] for e in stats["errors"]] == ["AN_2022002.taz"]
+    assert stats["errors"][0]["error"].startswith("Indexation")
+    assert es_conn.es.indices.calls == ["refresh"]
+
+
+def test_version_conflicts_are_skipped(es_conn, monkeypatch):
+    """Les 409 (document déjà indexé) ne sont ni des échecs ni des documents indexés"""
+    def outcome(doc):
+        if doc["texte"] == "existant":
+            return False, {"create": {"status": 409, "error": {"type": "version_conflict_engine_exception"}}}
+        return True, {"create": {"status": 201}}
+
+    stub_streaming_bulk(monkeypatch, outcome)
+    stats = index_files(BatchLoader(es_conn=es_conn), {
+        "AN_2022001.taz": [{"texte": "existant"}, {"texte": "nouveau"}],
+    })
+
+    assert (stats["success"], stats["failed"]) == (1, 0)
+    assert stats["documents_indexed"] == 1
+    assert stats["index_errors"] == 0
+    assert stats["errors"] == []
+
+
+def test_indexer_crash_drains_queue_and_fails_pending_files(es_conn, monkeypatch):
+    """
+    Si streaming_bulk lève, la file est vidée (les producteurs ne bloquent pas,
+    même au-delà de sa capacité) et tous les documents non indexés sont en échec
+    """
+    def streaming_bulk(client, actions, **kwargs):
+        actions = iter(actions)
+        next(actions)
+        yield True, {"create": {"status": 201}}
+        next(actions)
+        raise es_connection.ConnectionError("connexion perdue")
+
+    monkeypatch.setattr(es_connection.helpers, "streaming_bulk", streaming_bulk)
+    # Plus de documents que la capacité de la file (10000)
+    stats = index_files(BatchLoader(es_conn=es_conn), {
+        "AN_2022001.taz": [{"texte": "ok"}],
+        "AN_2022002.taz": [{"texte": "ok"}] * 6000,
+        "AN_2022003.taz": [{"texte": "ok"}] * 6000,
+    })
+
+    assert stats["documents_indexed"] == 1
+    assert stats["index_errors"] == 12000
+    assert (stats["success"], stats["failed"]) == (1, 2)
+    failed_files = {e["file"] for e in stats["errors"]}
+    assert failed_files == {"bulk-indexer", "AN_2022002.taz", "AN_2022003.taz"}
+
+
+# ============================================================================
+# COUPE-CIRCUIT
+# ============================================================================
+
+class FakeTransformer:
+    """Transformer factice: un document par fichier, ou aucun pour les fichiers 'vide'"""
+
+    def process_taz_file(self, taz_file, transformed_dir):
+        return [] if "vide" in taz_file else [{"texte": "ok"}]
+
+
+def fake_bulk_index(outcomes):
+    """
+    bulk_index factice: chaque appel consomme l'issue suivante de la séquence
+    (une exception à lever, ou None pour une indexation réussie)
+    """
+    outcomes = iter(outcomes)
+
+    def bulk_index(documents, **kwargs):
+        error = next(outcomes)
+        if error is not None:
+            raise error
+
+    return bulk_index
+
+
+def run_synchronous(loader, outcomes, name="AN_2022001.taz"):
+    """Traite un fichier par issue (indexation directe, sans thread bulk) et retourne les résultats"""
+    loader.es_conn.bulk_index = fake_bulk_index(outcomes)
+    return [
+        loader.process_single_file(Path(name), skip_existing=False)
+        for _ in range(len(outcomes))
+    ]
+
+
+@pytest.fixture
+def loader(es_conn):
+    return BatchLoader(es_conn=es_conn, transformer=FakeTransformer())
+
+
+def test_breaker_trips_after_identical_es_failures(loader):
+    """MAX_CONSECUTIVE_FAILURES erreurs ES identiques déclenchent le coupe-circuit"""
+    run_synchronous(loader, [ConnectionError("refusée")] * (MAX_CONSECUTIVE_FAILURES - 1))
+    assert not loader._failure_threshold_reached()
+
+    results = run_synchronous(loader, [ConnectionError("refusée")])
+    assert results[0]["error_type"] == "ConnectionError"
+    assert loader._failure_threshold_reached()
+
+    # Une fois déclenché, le coupe-circuit le reste
+    run_synchronous(loader, [None, ConnectionTimeout("délai")])
+    assert loader._failure_threshold_reached()
+
+
+def test_breaker_ignores_alternating_es_failures(loader):
+    """Des erreurs ES de natures différentes ne forment pas une série"""
+    errors = [ConnectionError("refusée"), ConnectionTimeout("délai")] * MAX_CONSECUTIVE_FAILURES
+    run_synchronous(loader, errors)
+    assert not loader._failure_threshold_reached()
+
+
+def test_breaker_resets_after_success(loader):
+    """Une indexation réussie remet la série à zéro"""
+    almost = [ConnectionError("refusée")] * (MAX_CONSECUTIVE_FAILURES - 1)
+    run_synchronous(loader, almost + [None] + almost)
+    assert not loader._failure_threshold_reached()
+
+    run_synchronous(loader, [ConnectionError("refusée")])
+    assert loader._failure_threshold_reached()
+
+
+def test_breaker_ignores_files_without_documents(loader):
+    """Les fichiers sans document extrait ne sont pas des échecs Elasticsearch"""
+    results = run_synchronous(loader, [None] * (2 * MAX_CONSECUTIVE_FAILURES), name="vide.taz")
+    assert all(r["error"] == "Aucun document extrait" for r in results)
+    assert not loader._failure_threshold_reached()
+
+
+def test_breaker_trips_on_rejected_bulk_requests(loader, monkeypatch):
+    """
+    Thread bulk: chaque requête _bulk rejetée en bloc compte une fois
+    (tous ses documents portent la même exception)
+    """
+    docs_per_request = 3
+    exceptions = []
+
+    def streaming_bulk(client, actions, **kwargs):
+        for i, _ in enumerate(actions):
+            if i % docs_per_request == 0:
+                exceptions.append(ConnectionTimeout("délai"))
+            yield False, {"create": {"error": "délai", "exception": exceptions[-1]}}
+
+    monkeypatch.setattr(es_connection.helpers, "streaming_bulk", streaming_bulk)
+    documents = [{"texte": "ok"}] * (docs_per_request * (MAX_CONSECUTIVE_FAILURES - 1))
+    index_files(loader, {"AN_2022001.taz": documents})
+    assert not loader._failure_threshold_reached()
+
+    # Une requête rejetée de plus complète la série
+    index_files(loader, {"AN_2022002.taz": [{"texte": "ok"}] * docs_per_request})
+    assert loader._failure_threshold_reached()
+
+
+def test_breaker_ignores_rejected_documents(loader, monkeypatch):
+    """Des documents rejetés un par un (mapping) ne déclenchent pas le coupe-circuit"""
+    stub_streaming_bulk(monkeypatch, lambda doc: (False, {"create": {"status": 400, "error": "mapper"}}))
+    index_files(loader, {"AN_2022001.taz": [{"texte": "ok"}] * (2 * MAX_CONSECUTIVE_FAILURES)})
+    assert not loader._failure_threshold_reached()
+
+
+def test_breaker_trips_when_bulk_indexer_crashes(loader, monkeypatch):
+    """Un arrêt de l'indexeur bulk déclenche immédiatement le coupe-circuit"""
+    def streaming_bulk(client, actions, **kwargs):
+        next(iter(actions))
+        raise ConnectionError("connexion perdue")
+        yield
+
+    monkeypatch.setattr(es_connection.helpers, "streaming_bulk", streaming_bulk)
+    index_files(loader, {"AN_2022001.taz": [{"texte": "ok"}]})
+    assert loader._failure_threshold_reached()
+    assert loader._failure_streak[0] == "ConnectionError"
@@ -1,22 +1,24 @@
 """
 Tests de l'indicateur de sentiment (positivity_evolution).
-Lancer avec: python tests/test_sentiment.py
-Charge le modèle une fois puis exécute les contrastes et les phrases de référence.
+Lancer avec: pytest tests/test_sentiment.py
+Le modèle est chargé une fois par session (fixtures model/tokenizer de conftest.py).
 """
-import sys
-from pathlib import Path
-
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import logging
 
 import numpy as np
-import torch
+import pytest
+
+from src.analysis.positivity_evolution import sentiment_score, sentiment_scores_batch
+
+# Un seul worker xdist possède le modèle (et le GPU)
+pytestmark = pytest.mark.xdist_group("gpu")
 
-from src.analysis.positivity_evolution import load_model, sentiment_score
+logger = logging.getLogger(__name__)
 
 
-def _score_from_probs(probs: np.ndarray) -> float:
-    """Moyenne pondérée 0..4 pour les tests de contraste/ordre."""
-    return float(np.dot(np.arange(5), probs))
+# Poids des classes (very_negative=0 .. very_positive=4) : score = probs @ _WEIGHTS,
+# moyenne pondérée 0..4 calculée d'un coup pour toute une matrice de probas
+_WEIGHTS = np.arange(5, dtype=np.float32)
 
 
 def test_sentiment_returns_vector(model, tokenizer):
@@ -34,12 +36,12 @@ def run_contrast_tests(model, tokenizer):
         ("C'est une réforme catastrophique.", "C'est une réforme bénéfique."),
         ("Le gouvernement ment.", "Le gouvernement est transparent."),
     ]
+    # Une seule passe du modèle pour toutes les phrases : (paires, [neg, pos], classes)
+    texts = [phrase for pair in pairs for phrase in pair]
+    probs = np.stack(sentiment_scores_batch(texts, model, tokenizer)).reshape(len(pairs), 2, -1)
+    scores = (probs @ _WEIGHTS).tolist()
     errors = []
-    for neg, pos in pairs:
-        p_neg = sentiment_score(neg, model, tokenizer)
-        p_pos = sentiment_score(pos, model, tokenizer)
-        s_neg = _score_from_probs(p_neg)
-        s_pos = _score_from_probs(p_pos)
+    for (neg, pos), (s_neg, s_pos) in zip(pairs, scores):
         if s_neg >= s_pos:
             errors.append(f"  '{neg}' ({s_neg:.3f}) >= '{pos}' ({s_pos:.3f})")
     # Au moins 3 paires sur 4 doivent respecter l'ordre (le modèle peut se tromper sur une)
@@ -60,11 +62,13 @@ def run_reference_ordering(model, tokenizer):
         ("positive", ["Je soutiens cette proposition.", "C'est un progrès pour les citoyens."]),
         ("very_positive", ["Bravo pour ce travail remarquable.", "Nous adhérons totalement à ce projet."]),
     ]
+    # Une seule passe du modèle pour toutes les phrases de référence
+    texts = [p for _, phrases in refs for p in phrases]
+    scores = iter((np.stack(sentiment_scores_batch(texts, model, tokenizer)) @ _WEIGHTS).tolist())
     means = []
     for label, phrases in refs:
-        vectors = [sentiment_score(p, model, tokenizer) for p in phrases]
-        scores = [_score_from_probs(v) for v in vectors]
-        mean = sum(scores) / len(scores)
+        label_scores = [next(scores) for _ in phrases]
+        mean = sum(label_scores) / len(label_scores)
         means.append((label, mean))
     errors = []
     very_neg_m = next(m for l, m in means if l == "very_negative")
@@ -77,39 +81,15 @@ def run_reference_ordering(model, tokenizer):
     return errors, means
 
 
-def main():
-    print("Chargement du modèle...")
-    model, tokenizer = load_model()
-    if torch.cuda.is_available():
-        model = model.cuda()
-    print("  OK")
-
-    print("Test: sentiment_score retourne un vecteur (5 probas)...")
-    test_sentiment_returns_vector(model, tokenizer)
-    print("  OK")
-
-    print("Tests de contraste (négatif < positif)...")
-    errs = run_contrast_tests(model, tokenizer)
-    if errs:
-        print("  ÉCHEC:")
-        for e in errs:
-            print(e)
-        sys.exit(1)
-    print("  OK")
-
-    print("Ordre des phrases de référence...")
-    errs, means = run_reference_ordering(model, tokenizer)
-    for label, m in means:
-        print(f"  {label}: {m:.3f}")
-    if errs:
-        print("  ÉCHEC (ordre non monotone):")
-        for e in errs:
-            print(e)
-        sys.exit(1)
-    print("  OK")
-
-    print("\nTous les tests sont passés.")
+def test_contrast_pairs(model, tokenizer):
+    """Au moins 3 paires (négatif, positif) sur 4 sont dans le bon ordre."""
+    errors = run_contrast_tests(model, tokenizer)
+    assert not errors, "Contrastes en échec:\n" + "\n".join(errors)
 
 
-if __name__ == "__main__":
-    main()
+def test_reference_ordering(model, tokenizer):
+    """Extrêmes dans le bon ordre et phrases neutres dans [1, 3]."""
+    errors, means = run_reference_ordering(model, tokenizer)
+    for label, m in means:
+        logger.info("%s: %.3f", label, m)
+    assert not errors, "Ordre non monotone:\n" + "\n".join(errors)